@@ -45,6 +45,8 @@ def parse_args():
     parser.add_argument("-page", action="store_true", help="Jede Seite als eigene Datei speichern")
     parser.add_argument("-histlit", action="store_true", help="Behalte historische Zeichen (keine Normalisierung)")
     parser.add_argument("-o", "--output", type=str, help="Ausgabeverzeichnis (Standard: gleiches Verzeichnis wie METS-Datei)")
+    parser.add_argument("-w", "--workers", type=int, help="Anzahl paralleler ALTO-Downloads (Standard: 16 bzw. OCR_WORKERS)")
+    parser.add_argument("-p", "--processes", type=int, help="Anzahl der Parser-Prozesse (Standard: 1, d. h. ohne Unterprozesse, bzw. OCR_PROCESSES)")
 
     args = parser.parse_args()
 
@@ -68,6 +70,8 @@ def parse_args():
             "mode": page_mode,
             "histlit": not normalize_text,
             "output": output_dir,
+            "workers": args.workers,
+            "processes": args.processes,
     }
 
 
@@ -1,179 +1,416 @@
 import os
 import json
 import logging
-from typing import List, Dict
-from ocr_utils import load_xml, extract_alto_text
-
-
-def extract_metadata_from_mets(mets_path: str) -> Dict[str, str]:
-    """Liest Metadaten (Titel, Verfasser, Erscheinungsjahr, VD-Nummer) aus der METS-Datei."""
-    try:
-        mets_root = load_xml(mets_path)
-    except Exception as e:
-        logging.warning(f"Metadaten konnten nicht aus METS gelesen werden: {e}")
-        return {"title": "", "author": "", "year": "", "vd_number": ""}
-
-    ns = {
-        "mets": "http://www.loc.gov/METS/",
-        "mods": "http://www.loc.gov/mods/v3",
-        "dc": "http://purl.org/dc/elements/1.1/"
-    }
-
-    title = ""
-    author = ""
-    year = ""
-    vd_number = ""
-
-    # Titel
-    title_elem = mets_root.find(".//mods:title", ns)
-    if title_elem is not None and title_elem.text:
-        title = title_elem.text.strip()
-    else:
-        dc_title = mets_root.find(".//dc:title", ns)
-        if dc_title is not None and dc_title.text:
-            title = dc_title.text.strip()
-
-    # Verfasser
-    name_elem = mets_root.find(".//mods:name/mods:displayForm", ns)
-    if name_elem is not None and name_elem.text:
-        author = name_elem.text.strip()
-    else:
-        dc_author = mets_root.find(".//dc:creator", ns)
-        if dc_author is not None and dc_author.text:
-            author = dc_author.text.strip()
-
-    # Erscheinungsjahr
-    year_elem = mets_root.find(".//mods:originInfo/mods:dateIssued", ns)
-    if year_elem is not None and year_elem.text:
-        year = year_elem.text.strip()
-    else:
-        dc_date = mets_root.find(".//dc:date", ns)
-        if dc_date is not None and dc_date.text:
-            year = dc_date.text.strip()
-
-    # VD-Nummer
-    for vd_type in ("vd16", "vd17", "vd18"):
-        vd_elem = mets_root.find(f".//mods:identifier[@type='{vd_type}']", ns)
-        if vd_elem is not None and vd_elem.text:
-            vd_number = f"{vd_type.upper()} {vd_elem.text.strip()}"
+import multiprocessing
+from functools import lru_cache
+from itertools import islice
+from operator import itemgetter
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict, Optional
+from lxml import etree
+from ocr_utils import (load_xml, iterparse_xml, fetch_xml_bytes, extract_alto_text_from_bytes,
+                       ensure_http_pool_size)
+
+try:
+    import orjson
+except ImportError:  # optional, sonst Standardbibliothek
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 16
+WRITE_WORKERS = 8
+WRITE_BUFFER = 1 << 20  # 1 MiB
+
+NS = {
+    "mets": "http://www.loc.gov/METS/",
+    "mods": "http://www.loc.gov/mods/v3",
+    "dc": "http://purl.org/dc/elements/1.1/",
+    "xlink": "http://www.w3.org/1999/xlink",
+}
+
+# Clark-Notation für einfache Elementschritte ohne XPath-Auswertung
+METS_NS = "{http://www.loc.gov/METS/}"
+MODS_NS = "{http://www.loc.gov/mods/v3}"
+DC_NS = "{http://purl.org/dc/elements/1.1/}"
+XLINK_HREF = "{http://www.w3.org/1999/xlink}href"
+
+_VD_TYPES = ("vd16", "vd17", "vd18")
+_XP_FULLTEXT_GRPS = etree.XPath(".//mets:fileGrp[@USE='FULLTEXT']", namespaces=NS)
+# Nur div-Elemente mit TYPE oder LABEL; unbenannte werden schon in libxml2 verworfen
+_XP_NAMED_DIVS = etree.XPath(".//mets:div[@TYPE != '' or @LABEL != '']", namespaces=NS)
+
+# Feste Metadatenfelder in der Reihenfolge der JSON-Ausgabe
+METADATA_FIELDS = ("title", "author", "year", "vd_number")
+_TEXT_FIELDS = METADATA_FIELDS[:-1]  # aus MODS bzw. Dublin Core gelesen
+_VD_FIELD = METADATA_FIELDS[-1]
+
+# Metadaten-Elemente für den Einzeldurchlauf: Tag → (Feld, Rang, erforderliches Elternelement);
+# Rang 0 (MODS) hat Vorrang vor Rang 1 (Dublin Core)
+_META_TAGS = {
+    MODS_NS + "title": ("title", 0, None),
+    DC_NS + "title": ("title", 1, None),
+    MODS_NS + "displayForm": ("author", 0, MODS_NS + "name"),
+    DC_NS + "creator": ("author", 1, None),
+    MODS_NS + "dateIssued": ("year", 0, MODS_NS + "originInfo"),
+    DC_NS + "date": ("year", 1, None),
+}
+
+
+def _note_metadata(elem, hits: dict) -> None:
+    """Merkt sich den Text des jeweils ersten Vorkommens eines Metadaten-Elements."""
+    if elem.tag == MODS_NS + "identifier":
+        vd_type = elem.get("type")
+        if vd_type in _VD_TYPES:
+            hits.setdefault((_VD_FIELD, vd_type), (elem.text or "").strip())
+        return
+    field, rank, parent_tag = _META_TAGS[elem.tag]
+    if parent_tag is None or elem.getparent().tag == parent_tag:
+        hits.setdefault((field, rank), (elem.text or "").strip())
+
+
+def _metadata_complete(hits: dict) -> bool:
+    """True, sobald weitere Elemente das Ergebnis nicht mehr ändern können."""
+    fields_done = all(hits.get((field, 0)) or ((field, 0) in hits and (field, 1) in hits)
+                      for field in _TEXT_FIELDS)
+    return fields_done and bool(hits.get((_VD_FIELD, "vd16")))
+
+
+def _resolve_metadata(hits: dict) -> Dict[str, str]:
+    """Wählt pro Feld MODS vor Dublin Core und die VD-Nummer in der Reihenfolge VD16 > VD17 > VD18."""
+    metadata = {field: hits.get((field, 0)) or hits.get((field, 1)) or "" for field in _TEXT_FIELDS}
+    metadata[_VD_FIELD] = ""
+    for vd_type in _VD_TYPES:
+        if hits.get((_VD_FIELD, vd_type)):
+            metadata[_VD_FIELD] = f"{vd_type.upper()} {hits[(_VD_FIELD, vd_type)]}"
+            break
+    return metadata
+
+
+@lru_cache(maxsize=8)
+def _parsed_mets(path: str, mtime_ns: int):
+    """Geparster METS-Baum, zwischengespeichert pro (Pfad, Änderungszeit)."""
+    return load_xml(path)
+
+
+def _load_mets(mets_path: str):
+    """
+    Lädt eine METS-Datei. Lokale Dateien werden wiederverwendet, solange sie sich
+    nicht ändern (z. B. wenn mehrere extract_*-Funktionen einzeln aufgerufen werden);
+    URLs werden über den Festplatten-Cache aus ocr_utils gelesen, der bei jedem
+    Aufruf beim Server revalidiert wird; geänderte METS-Dateien werden neu geladen.
+    """
+    path = str(mets_path)
+    if path.startswith("http"):
+        return load_xml(path, cache=True)
+    return _parsed_mets(path, os.stat(path).st_mtime_ns)
+
+
+def extract_metadata_from_mets(mets_path: str, mets_root=None) -> Dict[str, str]:
+    """
+    Liest Metadaten (Titel, Verfasser, Erscheinungsjahr, VD-Nummer) aus der METS-Datei.
+    Ein bereits geparstes METS-Wurzelelement kann über mets_root übergeben werden.
+    """
+    if mets_root is None:
+        try:
+            mets_root = _load_mets(mets_path)
+        except Exception as e:
+            logger.warning("Metadaten konnten nicht aus METS gelesen werden: %s", e)
+            return dict.fromkeys(METADATA_FIELDS, "")
+
+    # Ein einziger Durchlauf über die relevanten Elemente statt einer Suche pro Feld
+    hits = {}
+    for elem in mets_root.iter(*_META_TAGS, MODS_NS + "identifier"):
+        _note_metadata(elem, hits)
+        if _metadata_complete(hits):
             break
 
-    return {"title": title, "author": author, "year": year, "vd_number": vd_number}
-
+    return _resolve_metadata(hits)
 
-def extract_alto_links(mets_path: str) -> List[str]:
-    """Extrahiert ALTO-Dateilinks aus der METS-Datei."""
-    try:
-        mets_root = load_xml(mets_path)
-    except Exception as e:
-        logging.error(f"Konnte METS-Datei nicht laden: {e}")
-        raise
 
-    ns = {"mets": "http://www.loc.gov/METS/", "xlink": "http://www.w3.org/1999/xlink"}
-    files = []
-
-    for file_elem in mets_root.findall(".//mets:fileGrp[@USE='FULLTEXT']/mets:file", ns):
-        file_id = file_elem.attrib.get("ID", "")
-        flocat = file_elem.find(".//mets:FLocat", ns)
+def _collect_alto_files(file_grp, files: list) -> None:
+    """Sammelt (Sortierschlüssel, href) aller mets:file-Einträge einer FULLTEXT-fileGrp."""
+    for file_elem in file_grp.iterchildren(METS_NS + "file"):
+        file_id = file_elem.get("ID", "")
+        flocat = file_elem.find(METS_NS + "FLocat")
         if flocat is not None:
-            href = flocat.attrib.get("{http://www.w3.org/1999/xlink}href", "")
+            href = flocat.get(XLINK_HREF, "")
             if href:
-                files.append((file_id, href))
+                files.append((_alto_sort_key(file_id), href))
 
-    def sort_key(item):
-        try:
-            return int(item[0].split("_")[-1])
-        except Exception:
-            return item[0]
 
-    files.sort(key=sort_key)
-    logging.info(f"{len(files)} ALTO-Dateien gefunden.")
-    return [f[1] for f in files]
+def _alto_sort_key(file_id: str) -> tuple:
+    """
+    Sortiert nach numerischem ID-Suffix (z. B. FULLTEXT_0042 → 42);
+    IDs ohne Zahl folgen alphabetisch danach.
+    """
+    digits = file_id[len(file_id.rstrip("0123456789")):]
+    return (0, int(digits)) if digits else (1, file_id)
 
 
-def extract_structure(mets_path: str) -> List[Dict[str, str]]:
-    """Liest die logische Struktur (structMap TYPE='LOGICAL') aus METS."""
-    try:
-        mets_root = load_xml(mets_path)
-    except Exception as e:
-        logging.error(f"Konnte METS-Datei für Struktur nicht laden: {e}")
-        return []
+def extract_alto_links(mets_path: str, mets_root=None) -> List[str]:
+    """
+    Extrahiert ALTO-Dateilinks aus der METS-Datei (oder dem übergebenen mets_root).
+    Ohne mets_root wird die METS-Datei nur bis zum Ende der fileSec gestreamt.
+    """
+    files = []
 
-    ns = {"mets": "http://www.loc.gov/METS/"}
-    struct_divs = mets_root.findall(".//mets:structMap[@TYPE='LOGICAL']//mets:div", ns)
-    structure = []
+    if mets_root is not None:
+        for file_grp in _XP_FULLTEXT_GRPS(mets_root):
+            _collect_alto_files(file_grp, files)
+    else:
+        try:
+            for _, elem in iterparse_xml(mets_path, tag=(METS_NS + "fileGrp", METS_NS + "fileSec"),
+                                         cache=True):
+                if elem.tag == METS_NS + "fileSec":
+                    break  # alle Dateigruppen gelesen, structMap etc. nicht mehr nötig
+                if elem.get("USE") == "FULLTEXT":
+                    _collect_alto_files(elem, files)
+                elem.clear()
+        except Exception as e:
+            logger.error("Konnte METS-Datei nicht laden: %s", e)
+            raise
 
-    for div in struct_divs:
-        order = div.attrib.get("ORDER")
-        div_type = div.attrib.get("TYPE", "")
-        label = div.attrib.get("LABEL", "")
-        order_val = int(order) if order and order.isdigit() else None
-        if div_type or label:
-            structure.append({"order": order_val, "type": div_type, "label": label})
+    files.sort(key=itemgetter(0))
+    logger.info("%d ALTO-Dateien gefunden.", len(files))
+    return list(map(itemgetter(1), files))
 
-    logging.info(f"{len(structure)} Strukturelemente gefunden.")
-    return structure
 
+def _collect_structure(struct_map, structure: list) -> None:
+    """Sammelt die benannten bzw. typisierten div-Elemente einer logischen structMap."""
+    for div in _XP_NAMED_DIVS(struct_map):
+        order = div.get("ORDER")
+        order_val = int(order) if order and order.isdigit() else None
+        structure.append({"order": order_val, "type": div.get("TYPE", ""), "label": div.get("LABEL", "")})
 
-def extract_all_texts(mets_path: str, normalize: bool = True) -> Dict[str, str]:
-    """Lädt alle referenzierten ALTO-Dateien und extrahiert den Text pro Seite."""
-    alto_links = extract_alto_links(mets_path)
-    texts = {}
 
-    for i, link in enumerate(alto_links, start=1):
+def extract_structure(mets_path: str, mets_root=None) -> List[Dict[str, str]]:
+    """Liest die logische Struktur (structMap TYPE='LOGICAL') aus METS (oder dem übergebenen mets_root)."""
+    if mets_root is None:
         try:
-            alto_root = load_xml(str(link))
-            text = extract_alto_text(alto_root, normalize=normalize)
-            texts[f"page_{i:04d}"] = text
-            logging.info(f"Seite {i:04d} erfolgreich verarbeitet.")
+            mets_root = _load_mets(mets_path)
         except Exception as e:
-            logging.warning(f"Fehler beim Verarbeiten von {link}: {e}")
-            texts[f"page_{i:04d}"] = ""
+            logger.error("Konnte METS-Datei für Struktur nicht laden: %s", e)
+            return []
+
+    structure = []
+
+    for struct_map in mets_root.iter(METS_NS + "structMap"):
+        if struct_map.get("TYPE") == "LOGICAL":
+            _collect_structure(struct_map, structure)
 
-    return texts
+    logger.info("%d Strukturelemente gefunden.", len(structure))
+    return structure
+
+
+def _scan_mets(mets_path: str):
+    """
+    Liest Metadaten, logische Struktur und ALTO-Links in einem einzigen
+    Streaming-Durchlauf durch die METS-Datei. Verarbeitete fileGrp- und
+    structMap-Teilbäume werden sofort wieder freigegeben.
+    Gibt (metadata, structure, alto_links) zurück.
+    """
+    hits = {}
+    structure = []
+    files = []
+    tags = (METS_NS + "fileGrp", METS_NS + "structMap", MODS_NS + "identifier", *_META_TAGS)
+
+    for _, elem in iterparse_xml(mets_path, tag=tags, cache=True):
+        tag = elem.tag
+        if tag == METS_NS + "fileGrp":
+            if elem.get("USE") == "FULLTEXT":
+                _collect_alto_files(elem, files)
+        elif tag == METS_NS + "structMap":
+            if elem.get("TYPE") == "LOGICAL":
+                _collect_structure(elem, structure)
+        else:
+            _note_metadata(elem, hits)
+            continue  # Metadaten-Elemente sind klein, Elternprüfung braucht den Baum
+        elem.clear()
+
+    files.sort(key=itemgetter(0))
+    logger.info("%d ALTO-Dateien gefunden.", len(files))
+    logger.info("%d Strukturelemente gefunden.", len(structure))
+    return _resolve_metadata(hits), structure, list(map(itemgetter(1), files))
+
+
+def _worker_count(workers: Optional[int] = None) -> int:
+    """Anzahl paralleler Downloads (Argument, sonst Umgebungsvariable OCR_WORKERS)."""
+    if workers is None:
+        workers = int(os.environ.get("OCR_WORKERS", DEFAULT_WORKERS))
+    return max(1, workers)
+
+
+def _process_count(processes: Optional[int] = None) -> int:
+    """
+    Anzahl der Parser-Prozesse (Argument, sonst OCR_PROCESSES, sonst 1).
+    Standardmäßig wird ohne Unterprozesse geparst; der Prozess-Pool muss
+    ausdrücklich angefordert werden.
+    """
+    if processes is None:
+        processes = int(os.environ.get("OCR_PROCESSES", 1))
+    return max(1, processes)
+
+
+def _parse_alto(data: bytes, normalize: bool) -> str:
+    """Extrahiert den Text einer geladenen ALTO-Datei im Datenstrom (läuft ggf. im Unterprozess)."""
+    try:
+        return extract_alto_text_from_bytes(data, normalize=normalize)
+    except etree.XMLSyntaxError as e:
+        # lxml-Fehler lassen sich nicht zwischen Prozessen übertragen (nicht picklebar)
+        raise ValueError(str(e)) from None
+
+
+def extract_all_texts(mets_path: str, normalize: bool = True,
+                      workers: Optional[int] = None, mets_root=None,
+                      processes: Optional[int] = None,
+                      alto_links: Optional[List[str]] = None) -> Dict[str, str]:
+    """
+    Lädt alle referenzierten ALTO-Dateien und extrahiert den Text pro Seite.
+    Downloads laufen in einem Thread-Pool; das Parsen und Normalisieren wird,
+    sobald eine Datei geladen ist, an einen zweiten Thread-Pool übergeben oder,
+    mit processes > 1, an einen Prozess-Pool. Dessen Unterprozesse importieren
+    das aufrufende Skript neu, das daher einen if __name__ == "__main__"-Block braucht.
+    Bereits ermittelte ALTO-Links können über alto_links übergeben werden.
+    """
+    if alto_links is None:
+        alto_links = extract_alto_links(mets_path, mets_root=mets_root)
+    results = {}
+    errors = 0
+    debug = logger.isEnabledFor(logging.DEBUG)
+
+    num_workers = _worker_count(workers)
+    # Mehr Prozesse als Seiten lohnen den Start neuer Interpreter nicht
+    num_processes = min(_process_count(processes), max(1, len(alto_links)))
+    ensure_http_pool_size(num_workers)
+    if num_processes > 1:
+        parse_pool = ProcessPoolExecutor(max_workers=num_processes,
+                                         mp_context=multiprocessing.get_context("spawn"))
+    else:
+        parse_pool = ThreadPoolExecutor(max_workers=num_workers)
+
+    # Höchstens window Seiten gleichzeitig in Arbeit (Download oder Parsen), damit nie
+    # mehr als ein begrenzter Teil der Rohdaten im Speicher liegt
+    window = num_workers + 2 * num_processes
+    links = iter(enumerate(alto_links, start=1))
+    pending = {}  # Future → (Seitennummer, True für Download / False für Parsen)
+
+    with ThreadPoolExecutor(max_workers=num_workers) as fetch_pool, parse_pool:
+        for i, link in islice(links, window):
+            pending[fetch_pool.submit(fetch_xml_bytes, link, cache=True)] = (i, True)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                i, is_download = pending.pop(fut)
+                try:
+                    result = fut.result()
+                except Exception as e:
+                    if is_download:
+                        logger.warning("Fehler beim Laden von %s: %s", alto_links[i - 1], e)
+                    else:
+                        logger.warning("Fehler beim Verarbeiten von %s: %s", alto_links[i - 1], e)
+                    errors += 1
+                    results[i] = ""
+                else:
+                    if is_download:
+                        # Geladene Datei an den Parser übergeben; der Platz im Fenster bleibt belegt
+                        pending[parse_pool.submit(_parse_alto, result, normalize)] = (i, False)
+                        continue
+                    results[i] = result
+                    if debug:
+                        logger.debug("Seite %04d erfolgreich verarbeitet.", i)
+                # Seite abgeschlossen: nächsten Download nachschieben
+                for j, link in islice(links, 1):
+                    pending[fetch_pool.submit(fetch_xml_bytes, link, cache=True)] = (j, True)
+
+    logger.info("%d Seiten verarbeitet (%d Fehler).", len(alto_links), errors)
+
+    # Seiten in der Reihenfolge der ALTO-Links zusammenführen
+    return {f"page_{i:04d}": results[i] for i in range(1, len(alto_links) + 1)}
+
+
+def _json_bytes(obj) -> bytes:
+    """Serialisiert obj als eingerücktes UTF-8-JSON (mit orjson, falls installiert)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def _write_json_array(f, items, level: int = 0) -> None:
+    """
+    Schreibt eine JSON-Liste Element für Element, ohne sie vorher im Speicher
+    aufzubauen. Die Ausgabe entspricht json.dump(list(items), f, indent=2),
+    eingerückt um level Ebenen.
+    """
+    pad = b"\n" + b"  " * (level + 1)
+    first = True
+    f.write(b"[")
+    for item in items:
+        f.write(pad if first else b"," + pad)
+        # Zeilenumbrüche in Strings sind escaped, "\n" trennt hier nur Struktur
+        f.write(_json_bytes(item).replace(b"\n", pad))
+        first = False
+    f.write(b"]" if first else b"\n" + b"  " * level + b"]")
+
+
+def _metadata_base(metadata: Dict[str, str]) -> Dict[str, Optional[str]]:
+    """Gemeinsamer Metadatenblock der JSON-Ausgaben (feste Schlüssel, Quelle als Dateiname)."""
+    base = {field: metadata.get(field, "") for field in METADATA_FIELDS}
+    base["source"] = os.path.basename(metadata["_mets_path"]) if metadata.get("_mets_path") else None
+    return base
 
 
 def save_full_output(texts: Dict[str, str], output_path: str, fmt: str,
                      structure=None, metadata=None) -> None:
-    """Speichert den gesamten Text in einer einzigen Datei (mit Struktur + Metadaten)."""
+    """
+    Speichert den gesamten Text in einer einzigen Datei (mit Struktur + Metadaten).
+    JSON-Ausgabe: {"metadata": {...}, "structure": [...], "pages": [{"page", "order", "text"}, ...]};
+    die Metadaten stehen nur einmal im Kopf statt in jeder Seite.
+    """
     metadata = metadata or {}
-    num_pages = len(texts)
+    items = list(texts.items())  # Reihenfolge einmal festhalten
+    num_pages = len(items)
 
     if fmt == "json":
-        combined = []
-        if structure or metadata:
-            combined.append({
-                "structure": {
-                    "metadata": {
-                        "title": metadata.get("title", ""),
-                        "author": metadata.get("author", ""),
-                        "year": metadata.get("year", ""),
-                        "vd_number": metadata.get("vd_number", ""),
-                        "source": os.path.basename(metadata.get("_mets_path", "")) if metadata.get("_mets_path") else None,
-                        "num_pages": num_pages
-                    },
-                    "divs": structure or []
-                }
-            })
-        for i, (page, content) in enumerate(texts.items(), start=1):
-            combined.append({
-                "page": page,
-                "order": i,
-                "text": content,
-                "title": metadata.get("title", ""),
-                "author": metadata.get("author", ""),
-                "year": metadata.get("year", ""),
-                "vd_number": metadata.get("vd_number", ""),
-                "source": os.path.basename(metadata.get("_mets_path", "")) if metadata.get("_mets_path") else None
-            })
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(combined, f, ensure_ascii=False, indent=2)
+        base = _metadata_base(metadata)
+        head = {
+            "metadata": {**base, "num_pages": num_pages},
+            "structure": structure or []
+        }
+        pages = ({"page": page, "order": i, "text": content}
+                 for i, (page, content) in enumerate(items, start=1))
+
+        with open(output_path, "wb", buffering=WRITE_BUFFER) as f:
+            # Kopfeinträge einzeln eingerückt schreiben, danach die Seitenliste gestreamt
+            f.write(b"{")
+            for key, value in head.items():
+                f.write(b"\n  " + _json_bytes(key) + b": " + _json_bytes(value).replace(b"\n", b"\n  ") + b",")
+            f.write(b'\n  "pages": ')
+            _write_json_array(f, pages, level=1)
+            f.write(b"\n}")
     else:
-        sep = "\n\n---\n\n" if fmt == "md" else "\n\n"
-        content = sep.join(texts.values())
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(content)
-    logging.info(f"Gesamtausgabe gespeichert: {output_path}")
+        sep = b"\n\n---\n\n" if fmt == "md" else b"\n\n"
+        # Seitenweise als UTF-8-Bytes schreiben, statt den Gesamttext vorher zusammenzufügen
+        with open(output_path, "wb", buffering=WRITE_BUFFER) as f:
+            first = True
+            for _, content in items:
+                if not first:
+                    f.write(sep)
+                f.write(content.encode("utf-8"))
+                first = False
+    logger.info("Gesamtausgabe gespeichert: %s", output_path)
+
+
+def _write_page(path: str, data: bytes) -> None:
+    """Schreibt eine Seitendatei direkt über os.write (in der Regel ein einziger Systemaufruf)."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o666)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
 
 
 def save_pagewise_output(texts: Dict[str, str], output_dir: str, fmt: str,
@@ -181,49 +418,52 @@ def save_pagewise_output(texts: Dict[str, str], output_dir: str, fmt: str,
     """Speichert jede Seite einzeln (mit Strukturdatei content.json)."""
     metadata = metadata or {}
     os.makedirs(output_dir, exist_ok=True)
-    num_pages = len(texts)
+    items = list(texts.items())  # Reihenfolge einmal festhalten
+    num_pages = len(items)
 
     if fmt == "json":
+        base = _metadata_base(metadata)  # einmal aufgebaut statt pro Seite
+
         # content.json mit Struktur + Metadaten + Seitenzahl
         if structure or metadata:
             content_path = os.path.join(output_dir, "content.json")
             content_data = {
-                "metadata": {
-                    "title": metadata.get("title", ""),
-                    "author": metadata.get("author", ""),
-                    "year": metadata.get("year", ""),
-                    "vd_number": metadata.get("vd_number", ""),
-                    "source": os.path.basename(metadata.get("_mets_path", "")) if metadata.get("_mets_path") else None,
-                    "num_pages": num_pages
-                },
+                "metadata": {**base, "num_pages": num_pages},
                 "divs": structure or []
             }
-            with open(content_path, "w", encoding="utf-8") as f:
-                json.dump(content_data, f, ensure_ascii=False, indent=2)
-            logging.info(f"Strukturdatei gespeichert: {content_path}")
-
-        for i, (page, content) in enumerate(texts.items(), start=1):
-            out_path = os.path.join(output_dir, f"{page}.json")
-            data = {
-                "page": page,
-                "order": i,
-                "text": content,
-                "title": metadata.get("title", ""),
-                "author": metadata.get("author", ""),
-                "year": metadata.get("year", ""),
-                "vd_number": metadata.get("vd_number", ""),
-                "source": os.path.basename(metadata.get("_mets_path", "")) if metadata.get("_mets_path") else None
-            }
-            with open(out_path, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            logging.info(f"Seite gespeichert: {out_path}")
+            with open(content_path, "wb") as f:
+                f.write(_json_bytes(content_data))
+            logger.info("Strukturdatei gespeichert: %s", content_path)
+
+        def render(page, i, content):
+            return _json_bytes({"page": page, "order": i, "text": content, **base})
+    else:
+        def render(page, i, content):
+            return content.encode("utf-8")
+
+    def write(item):
+        # Serialisierung erst im Schreib-Thread, damit nie alle Seiten kodiert im Speicher liegen
+        i, (page, content) = item
+        out_path = os.path.join(output_dir, f"{page}.{fmt}")
+        _write_page(out_path, render(page, i, content))
+        return out_path
+
+    # Dateioperationen geben den GIL frei, daher parallel schreiben
+    debug = logger.isEnabledFor(logging.DEBUG)
+    with ThreadPoolExecutor(max_workers=WRITE_WORKERS) as ex:
+        for out_path in ex.map(write, enumerate(items, start=1)):
+            if debug:
+                logger.debug("Seite gespeichert: %s", out_path)
+    logger.info("%d Seiten gespeichert: %s", num_pages, output_dir)
 
 
 def run_extraction(mets_path: str,
                    output_format: str = "txt",
                    full: bool = True,
                    histlit: bool = False,
-                   output_dir: str = ".") -> None:
+                   output_dir: str = ".",
+                   workers: Optional[int] = None,
+                   processes: Optional[int] = None) -> None:
     """Führt die gesamte OCR-Extraktion aus."""
     if not mets_path:
         raise ValueError("mets_path darf nicht leer sein.")
@@ -231,13 +471,14 @@ def run_extraction(mets_path: str,
         raise ValueError("output_dir darf nicht leer sein.")
 
     normalize = not histlit
-    logging.info(f"Lese METS-Datei: {mets_path}")
+    logger.info("Lese METS-Datei: %s", mets_path)
 
-    metadata = extract_metadata_from_mets(mets_path)
+    # METS in einem einzigen Durchlauf lesen, statt für jede Hilfsfunktion erneut
+    metadata, structure, alto_links = _scan_mets(mets_path)
     metadata["_mets_path"] = mets_path  # Quelle speichern
 
-    structure = extract_structure(mets_path)
-    texts = extract_all_texts(mets_path, normalize=normalize)
+    texts = extract_all_texts(mets_path, normalize=normalize, workers=workers,
+                              processes=processes, alto_links=alto_links)
 
     base_name = os.path.splitext(os.path.basename(mets_path))[0]
     os.makedirs(output_dir, exist_ok=True)
@@ -249,4 +490,4 @@ def run_extraction(mets_path: str,
         page_dir = os.path.join(output_dir, f"{base_name}_pages")
         save_pagewise_output(texts, page_dir, output_format, structure=structure, metadata=metadata)
 
-    logging.info("Extraktion abgeschlossen.")
+    logger.info("Extraktion abgeschlossen.")
@@ -65,6 +65,8 @@ def normalize_args(args: dict) -> dict:
     return {"format": out_format,
             "mode": mode,
             "histlit": bool(args.get("histlit", False)),
+            "workers": args.get("workers"),
+            "processes": args.get("processes"),
     }
 
 
@@ -81,6 +83,8 @@ def main() -> None:
                        full=(params["mode"] == "full"),
                        histlit=params["histlit"],
                        output_dir=str(output_dir),
+                       workers=params["workers"],
+                       processes=params["processes"],
         )
         logging.info("OCR-Extraktion erfolgreich abgeschlossen.")
     except Exception:
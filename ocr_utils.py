@@ -2,74 +2,329 @@
 ocr_utils.py
 -------------
 Hilfsfunktionen für die OCR-Text-Extraktion:
-- Laden und Parsen von XML (lokal oder HTTP)
+- Laden und Parsen von XML (lokal oder HTTP, optional mit Festplatten-Cache)
 - Extraktion von Text aus ALTO-Dateien
 - Optionale Normalisierung historischer Zeichen
 """
 
-import xml.etree.ElementTree as ET
+from lxml import etree
 from pathlib import Path
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import hashlib
+import io
+import json
 import logging
+import os
 import re
+import threading
 
 
-def load_xml(source) -> ET.Element:
+logger = logging.getLogger(__name__)
+
+# Gemeinsame HTTP-Session: Verbindungen zum selben Server werden wiederverwendet
+# (Keep-Alive), statt für jede ALTO-Datei neu aufgebaut zu werden.
+_SESSION = requests.Session()
+_POOL_MAXSIZE = 0
+
+
+def ensure_http_pool_size(maxsize: int) -> None:
+    """
+    Stellt sicher, dass der Verbindungspool pro Host mindestens maxsize
+    Keep-Alive-Verbindungen hält, damit jeder Download-Thread seine Verbindung
+    behält, statt sie nach jeder Anfrage zu verwerfen.
+    """
+    global _POOL_MAXSIZE
+    if maxsize <= _POOL_MAXSIZE:
+        return
+    # Bisherige Adapter schließen, damit ihre Keep-Alive-Verbindungen nicht offen bleiben
+    for old_adapter in {_SESSION.get_adapter("http://"), _SESSION.get_adapter("https://")}:
+        old_adapter.close()
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=maxsize,
+                          max_retries=Retry(total=3, backoff_factor=0.3,
+                                            status_forcelist=[502, 503, 504]))
+    _SESSION.mount("http://", adapter)
+    _SESSION.mount("https://", adapter)
+    _POOL_MAXSIZE = maxsize
+
+
+ensure_http_pool_size(64)
+
+
+_PARSER_LOCAL = threading.local()
+
+
+def _xml_parser() -> etree.XMLParser:
+    """
+    Liefert einen libxml2-Parser pro Thread (Parser-Instanzen sind nicht threadsicher).
+    Leerraum-Textknoten werden verworfen, IDs nicht indexiert.
+    """
+    parser = getattr(_PARSER_LOCAL, "parser", None)
+    if parser is None:
+        parser = etree.XMLParser(huge_tree=True, remove_blank_text=True, collect_ids=False)
+        _PARSER_LOCAL.parser = parser
+    return parser
+
+
+def _cache_dir() -> Path:
+    """Verzeichnis des HTTP-Caches (OCR_CACHE_DIR, sonst ~/.cache/ocr-extractor)."""
+    return Path(os.environ.get("OCR_CACHE_DIR") or Path.home() / ".cache" / "ocr-extractor")
+
+
+def _cache_enabled() -> bool:
+    """Der HTTP-Cache lässt sich über OCR_DISABLE_CACHE=1 abschalten."""
+    return os.environ.get("OCR_DISABLE_CACHE") != "1"
+
+
+_CACHE_MAX_BYTES = int(os.environ.get("OCR_CACHE_MAX_MB", 1024)) << 20
+_CACHE_PRUNED = False
+_CACHE_LOCK = threading.Lock()
+
+
+def _prune_cache(cache_dir: Path) -> None:
+    """
+    Hält den Cache unter OCR_CACHE_MAX_MB (Standard: 1024 MiB), indem die am
+    längsten nicht mehr genutzten Einträge gelöscht werden. Läuft einmal pro Prozess.
+    """
+    global _CACHE_PRUNED
+    with _CACHE_LOCK:
+        if _CACHE_PRUNED:
+            return
+        _CACHE_PRUNED = True
+        try:
+            entries = [(entry.stat(), entry) for entry in cache_dir.iterdir() if entry.is_file()]
+        except OSError:
+            return
+        total = sum(stat.st_size for stat, _ in entries)
+        for stat, entry in sorted(entries, key=lambda item: item[0].st_mtime):
+            if total <= _CACHE_MAX_BYTES:
+                break
+            try:
+                entry.unlink()
+            except OSError:
+                continue
+            total -= stat.st_size
+
+
+def _read_cache_entry(cache_path: Path):
+    """
+    Liest einen Cache-Eintrag: eine JSON-Zeile mit ETag/Last-Modified, danach die
+    Antwortdaten. Gibt (Validatoren, Daten) zurück, bei fehlendem oder
+    unlesbarem Eintrag ({}, None).
+    """
+    try:
+        header, _, data = cache_path.read_bytes().partition(b"\n")
+        validators = json.loads(header)
+    except (OSError, ValueError):
+        return {}, None
+    if not isinstance(validators, dict):
+        return {}, None
+    return validators, data
+
+
+def _write_cache_entry(cache_path: Path, validators: dict, data: bytes) -> None:
+    """Schreibt einen Cache-Eintrag atomar (keine halb geschriebenen Einträge)."""
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp_path.write_bytes(json.dumps(validators).encode("utf-8") + b"\n" + data)
+    os.replace(tmp_path, cache_path)
+
+
+def _fetch_cached(url: str) -> bytes:
+    """
+    Lädt eine URL über den Festplatten-Cache. Liegt ein Eintrag vor, wird er per
+    bedingter Anfrage (If-None-Match/If-Modified-Since) beim Server geprüft und
+    nur bei 304 Not Modified von der Platte gelesen; geänderte Dateien werden
+    neu geladen. Zwischengespeichert werden nur Antworten mit ETag oder
+    Last-Modified, HTML-Seiten (z. B. Fehlerseiten) nie.
+    """
+    cache_dir = _cache_dir()
+    _prune_cache(cache_dir)
+    cache_path = cache_dir / hashlib.sha1(url.encode("utf-8")).hexdigest()
+    validators, cached = _read_cache_entry(cache_path)
+
+    headers = {}
+    if cached is not None:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+    response = _SESSION.get(url, timeout=20, headers=headers)
+    if response.status_code == 304 and cached is not None:
+        try:
+            os.utime(cache_path)  # zuletzt genutzt, für _prune_cache
+        except OSError:
+            pass
+        return cached
+    response.raise_for_status()
+    data = response.content
+
+    validators = {"etag": response.headers.get("ETag"),
+                  "last_modified": response.headers.get("Last-Modified")}
+    is_html = response.headers.get("Content-Type", "").startswith("text/html")
+    try:
+        if (validators["etag"] or validators["last_modified"]) and not is_html:
+            _write_cache_entry(cache_path, validators, data)
+        elif cached is not None:
+            cache_path.unlink()  # veralteter Eintrag ohne Validatoren
+    except OSError as e:
+        logger.warning("Antwort konnte nicht zwischengespeichert werden (%s): %s", url, e)
+    return data
+
+
+def _source_str(source) -> str:
+    """Pfad oder URL als str; Zeichenketten (der Normalfall) werden unverändert übernommen."""
+    return source if isinstance(source, str) else str(source)
+
+
+def fetch_xml_bytes(source, cache: bool = False) -> bytes:
+    """
+    Liest den Rohinhalt einer XML-Datei (lokal oder über HTTP).
+    Mit cache=True werden HTTP-Antworten auf der Festplatte zwischengespeichert
+    und bei jedem Zugriff beim Server revalidiert (abschaltbar über die
+    Umgebungsvariable OCR_DISABLE_CACHE=1).
+    """
+    source_str = _source_str(source)
+    if source_str.startswith("http"):
+        if cache and _cache_enabled():
+            return _fetch_cached(source_str)
+        response = _SESSION.get(source_str, timeout=20)
+        response.raise_for_status()
+        return response.content
+    return Path(source_str).read_bytes()
+
+
+def parse_xml(data: bytes) -> etree._Element:
+    """Parst XML-Bytes und gibt das Wurzelelement zurück."""
+    return etree.fromstring(data, parser=_xml_parser())
+
+
+def load_xml(source, cache: bool = False) -> etree._Element:
     """
     Lädt eine XML-Datei (lokal oder über HTTP).
-    Gibt das Wurzelelement zurück.
+    Gibt das Wurzelelement zurück. cache=True nutzt für URLs den Festplatten-Cache.
     """
-    source_str = str(source)
+    source_str = _source_str(source)
     try:
         if source_str.startswith("http"):
-            response = requests.get(source_str, timeout=20)
-            response.raise_for_status()
-            return ET.fromstring(response.content)
+            return parse_xml(fetch_xml_bytes(source_str, cache=cache))
         else:
-            path = Path(source_str)
-            with path.open("rb") as f:
-                return ET.parse(f).getroot()
+            # libxml2 liest lokale Dateien selbst, ohne Umweg über ein Python-Dateiobjekt
+            return etree.parse(source_str, parser=_xml_parser()).getroot()
     except Exception as e:
-        logging.error(f"Fehler beim Laden von XML ({source_str}): {e}")
+        logger.error("Fehler beim Laden von XML (%s): %s", source_str, e)
         raise
 
 
-def extract_alto_text(alto_root: ET.Element, normalize: bool = True) -> str:
+def iterparse_xml(source, tag, cache: bool = False):
+    """
+    Parst eine XML-Datei (lokal oder über HTTP) inkrementell, ohne das
+    vollständige Dokument aufzubauen. Liefert (event, element) für jedes
+    schließende Element mit passendem Tag; der Aufrufer gibt verarbeitete
+    Elemente per clear() frei und darf die Schleife vorzeitig abbrechen.
+    Mit cache=True werden URLs über den (revalidierten) Festplatten-Cache
+    gelesen statt direkt aus der Antwort gestreamt.
+    """
+    source_str = _source_str(source)
+    options = dict(events=("end",), tag=tag, huge_tree=True,
+                   remove_blank_text=True, collect_ids=False)
+    try:
+        if source_str.startswith("http") and cache and _cache_enabled():
+            yield from etree.iterparse(io.BytesIO(fetch_xml_bytes(source_str, cache=True)), **options)
+        elif source_str.startswith("http"):
+            with _SESSION.get(source_str, timeout=20, stream=True) as response:
+                response.raise_for_status()
+                response.raw.decode_content = True
+                yield from etree.iterparse(response.raw, **options)
+        else:
+            with Path(source_str).open("rb") as f:
+                yield from etree.iterparse(f, **options)
+    except Exception as e:
+        logger.error("Fehler beim Laden von XML (%s): %s", source_str, e)
+        raise
+
+
+def _alto_line_text(line_elem: etree._Element) -> str:
+    """
+    Fügt die Wörter (String/@CONTENT) einer TextLine zu einer Zeile zusammen.
+    String-Elemente werden im Namespace der TextLine gesucht.
+    """
+    string_tag = line_elem.tag[:-len("TextLine")] + "String"
+    return " ".join(filter(None, (w.get("CONTENT") for w in line_elem.iter(string_tag))))
+
+
+def _join_page(lines: list, normalize: bool) -> str:
+    """Fügt die Zeilen einer Seite zusammen und normalisiert die Seite in einem Aufruf."""
+    page = "\n".join(lines)
+    if normalize:
+        page = normalize_historical_characters(page)
+    return page
+
+
+def extract_alto_text(alto_root: etree._Element, normalize: bool = True) -> str:
     """
     Extrahiert den Text aus einer ALTO-XML-Struktur.
     Wenn normalize=True, werden historische Zeichen modernisiert.
     """
-    ns = {"alto": "http://www.loc.gov/standards/alto/ns-v4#"}
+    # Namespace einmal am Wurzelelement ablesen (ALTO v2–v4 oder ohne Namespace),
+    # dann genau ein Durchlauf über die TextLine-Elemente
+    namespace = etree.QName(alto_root).namespace
+    textline_tag = f"{{{namespace}}}TextLine" if namespace else "TextLine"
+    lines = [_alto_line_text(line_elem) for line_elem in alto_root.iter(textline_tag)]
+
+    return _join_page(lines, normalize)
+
+
+def extract_alto_text_from_bytes(data: bytes, normalize: bool = True) -> str:
+    """
+    Wie extract_alto_text, parst die ALTO-Datei aber als Datenstrom: Jede TextLine
+    wird nach dem Auslesen samt vorheriger Geschwister freigegeben, sodass nie
+    mehr als die aktuelle Zeile im Speicher liegt.
+    """
     lines = []
 
-    # Versucht, TextLine-Elemente zu finden (robust gegenüber Namespace-Abweichungen)
-    for line_elem in alto_root.findall(".//alto:TextLine", ns) or alto_root.findall(".//TextLine"):
-        words = [w.attrib.get("CONTENT", "") for w in line_elem.findall(".//alto:String", ns)]
-        line_text = " ".join(w for w in words if w)
-        if normalize:
-            line_text = normalize_historical_characters(line_text)
-        lines.append(line_text)
+    # "{*}TextLine" erfasst TextLine in jedem Namespace (ALTO v2–v4) und ohne Namespace
+    for _, line_elem in etree.iterparse(io.BytesIO(data), events=("end",), tag="{*}TextLine",
+                                        huge_tree=True, remove_blank_text=True, collect_ids=False):
+        lines.append(_alto_line_text(line_elem))
+        line_elem.clear()
+        while line_elem.getprevious() is not None:
+            del line_elem.getparent()[0]
 
-    return "\n".join(lines)
+    return _join_page(lines, normalize)
+
+
+# Historische Zeichen und ihre modernen Entsprechungen (kann je nach Projektbedarf erweitert werden)
+HISTORICAL_REPLACEMENTS = {"ſ": "s", "ẞ": "SS",
+                           "ﬀ": "ff", "ﬁ": "fi", "ﬂ": "fl", "ﬃ": "ffi", "ﬄ": "ffl",
+                           "uͤ": "ü", "oͤ": "ö", "aͤ": "ä",
+                           "Uͤ": "Ü", "Oͤ": "Ö", "Aͤ": "Ä",
+                           "u\u0308": "ü", "o\u0308": "ö", "a\u0308": "ä",  # kombinierendes Trema
+                           "⸗": "-"
+}
+
+# Einzelzeichen werden per str.translate in einem Durchlauf ersetzt,
+# Zeichenfolgen (Buchstabe + kombinierendes Zeichen) über einen gemeinsamen Regex
+_CHAR_TABLE = str.maketrans({old: new for old, new in HISTORICAL_REPLACEMENTS.items() if len(old) == 1})
+_SEQUENCES = {old: new for old, new in HISTORICAL_REPLACEMENTS.items() if len(old) > 1}
+_SEQUENCE_RE = re.compile("|".join(map(re.escape, sorted(_SEQUENCES, key=len, reverse=True))))
+# Leerraum ohne Zeilenumbruch, damit ganze Seiten zeilenweise bereinigt werden
+_SPACE_BEFORE_PUNCT_RE = re.compile(r"[^\S\n]+([.,;:!?])")
+_LINE_EDGE_SPACE_RE = re.compile(r"^[^\S\n]+|[^\S\n]+$", re.MULTILINE)
 
 
 def normalize_historical_characters(text: str) -> str:
     """
     Normalisiert häufige historische Buchstabenformen
     wie das lange s (ſ), Ligaturen und Akzentvarianten.
-    Diese Funktion kann je nach Projektbedarf erweitert werden.
+    Die Ersetzungen stehen in HISTORICAL_REPLACEMENTS. Der Text kann aus
+    mehreren Zeilen bestehen; Zeilenumbrüche bleiben erhalten.
     """
-    replacements = {"ſ": "s", "ẞ": "SS", 
-                    "ﬀ": "ff", "ﬁ": "fi", "ﬂ": "fl", "ﬃ": "ffi", "ﬄ": "ffl",        
-                    "uͤ": "ü", "oͤ": "ö", "aͤ": "ä", 
-                    "Uͤ": "Ü", "Oͤ": "Ö", "Aͤ": "Ä",
-                    "ü": "ü", "ö": "ö", "ä": "ä",
-                    "⸗": "-"                    
-    }
-
-    for old, new in replacements.items():
-        text = text.replace(old, new)
+    text = text.translate(_CHAR_TABLE)
+    text = _SEQUENCE_RE.sub(lambda m: _SEQUENCES[m.group()], text)
 
     # Entferne überflüssige Leerzeichen vor Satzzeichen
-    text = re.sub(r"\s+([.,;:!?])", r"\1", text)
-    return text.strip()
+    text = _SPACE_BEFORE_PUNCT_RE.sub(r"\1", text)
+    return _LINE_EDGE_SPACE_RE.sub("", text)